@@ -5,28 +5,47 @@ from discord.ext import commands, tasks
 
 import config
 
+# the prefix is a config constant, build the suffix once instead of every minute
+HELP_SUFFIX = f" | {config.default_command_prefix}help"
+
 
 class StatusCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self._last_status = None
         self.changestatus.start()
 
     def cog_unload(self):
         self.changestatus.cancel()
 
-    @tasks.loop(seconds=60)
-    async def changestatus(self):
+    async def update_status(self):
+        guilds = len(self.bot.guilds)
+        s = '' if guilds == 1 else 's'
         if datetime.datetime.now().month == 6:  # june (pride month)
-            status_text = f"LGBTQ+ pride in {len(self.bot.guilds)} server{'' if len(self.bot.guilds) == 1 else 's'}! | {config.default_command_prefix}help"
-            game = discord.Activity(
-                name=status_text,
-                type=discord.ActivityType.watching)
+            status_text = f"LGBTQ+ pride in {guilds} server{s}!{HELP_SUFFIX}"
+            activity_type = discord.ActivityType.watching
         else:
-            status_text = f"with your media in {len(self.bot.guilds)} server{'' if len(self.bot.guilds) == 1 else 's'} | {config.default_command_prefix}help"
-            game = discord.Activity(
-                name=status_text,
-                type=discord.ActivityType.playing)
-        await self.bot.change_presence(activity=game)
+            status_text = f"with your media in {guilds} server{s}{HELP_SUFFIX}"
+            activity_type = discord.ActivityType.playing
+        # the guild count rarely changes, don't send the gateway an identical presence
+        if status_text == self._last_status:
+            return
+        self._last_status = status_text
+        await self.bot.change_presence(activity=discord.Activity(name=status_text, type=activity_type))
+
+    # guild joins/leaves push updates immediately, so the loop is just a safety net
+    # that also catches the month rolling in or out of june
+    @tasks.loop(minutes=5)
+    async def changestatus(self):
+        await self.update_status()
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild):
+        await self.update_status()
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        await self.update_status()
 
     @changestatus.before_loop
     async def before_printer(self):
@@ -10,6 +10,13 @@ async def init_database():
     global db
     logger.debug("database connecting")
     db = await aiosqlite.connect(config.db_filename)
+    # prefix lookups and ban checks run on every message, tune the one long-lived
+    # connection for lots of small reads. journal_mode=WAL is set persistently at
+    # table creation; these reset per-connection.
+    await db.execute("PRAGMA synchronous=NORMAL")
+    await db.execute("PRAGMA temp_store=MEMORY")
+    await db.execute("PRAGMA cache_size=-64000")
+    await db.execute("PRAGMA mmap_size=268435456")
 
 
 async def close_database():
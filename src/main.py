@@ -7,7 +7,11 @@ import sqlite3
 import sys
 import traceback
 
-sys.path.insert(0, os.getcwd())
+# config.py lives in the repo root; append it (rather than prepending the cwd) so
+# repo files can't shadow stdlib or site-packages and the entrypoint works from any cwd
+_repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _repo_root not in sys.path:
+    sys.path.append(_repo_root)
 from utils import tempfiles
 
 try:
@@ -26,8 +30,6 @@ try:
     import glob
     from discord.ext import commands, tasks
     from tblib import pickling_support
-
-    pickling_support.install()
 except ModuleNotFoundError as e:
     print("".join(traceback.format_exception(type(e), e, tb=e.__traceback__)), file=sys.stderr)
     sys.exit("MediaForge was unable to import the required libraries and files. Did you follow the self-hosting guide "
@@ -57,8 +59,6 @@ if not hasattr(config, "bot_token") or config.bot_token == "EXAMPLE_TOKEN":
     sys.exit("The bot token could not be found or hasn't been properly set. Be sure to follow the self-hosting "
              "guide on GitHub. https://github.com/machineonamission/mediaforge#to-self-host")
 
-discord.Message.orig_reply = discord.Message.reply
-
 async def safe_reply(self: discord.Message, *args, **kwargs) -> discord.Message:
     try:
         await self.channel.fetch_message(self.id)
@@ -74,29 +74,42 @@ async def safe_reply(self: discord.Message, *args, **kwargs) -> discord.Message:
         return await self.channel.send(content, **kwargs, allowed_mentions=discord.AllowedMentions(
             everyone=False, users=True, roles=False, replied_user=True))
 
-discord.Message.reply = safe_reply
+
+def install_patches():
+    # explicit init instead of import-time side effects, so tooling that imports this
+    # module doesn't silently monkeypatch discord
+    pickling_support.install()
+    discord.Message.orig_reply = discord.Message.reply
+    discord.Message.reply = safe_reply
 
 async def downloadttsvoices():
     if sys.platform != 'win32':
         ttspath = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tts")
         femalevoice = os.path.join(ttspath, "mycroft_voice_4.0.flitevox")
         malevoice = os.path.join(ttspath, "cmu_us_slt.flitevox")
+        downloads = []
         if not os.path.isfile(malevoice):
             logger.log(25, "Downloading male TTS voice...")
-            await download_async("https://github.com/MycroftAI/mimic1/raw/development/voices/mycroft_voice_4.0.flitevox",
-                          malevoice)
-            logger.log(35, "Male TTS voice downloaded!")
+            downloads.append(download_async(
+                "https://github.com/MycroftAI/mimic1/raw/development/voices/mycroft_voice_4.0.flitevox",
+                malevoice))
         if not os.path.isfile(femalevoice):
             logger.log(25, "Downloading female TTS voice...")
-            await download_async("https://github.com/MycroftAI/mimic1/raw/development/voices/cmu_us_slt.flitevox",
-                          femalevoice)
-            logger.log(35, "Female TTS voice downloaded!")
+            downloads.append(download_async(
+                "https://github.com/MycroftAI/mimic1/raw/development/voices/cmu_us_slt.flitevox",
+                femalevoice))
+        if downloads:
+            # the voices are independent fetches, download them concurrently
+            await asyncio.gather(*downloads)
+            logger.log(35, "TTS voice(s) downloaded!")
         mimicpath = os.path.join(ttspath, "mimic")
         os.chmod(mimicpath, os.stat(mimicpath).st_mode | 0o111)
 
 def initdbsync():
     syncdb = sqlite3.connect(config.db_filename)
     with syncdb:
+        # WAL is persistent, set it once here so readers never block the writer
+        syncdb.execute("PRAGMA journal_mode=WAL")
         cur = syncdb.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='guild_prefixes'")
         if not cur.fetchall():
             syncdb.execute(
@@ -110,20 +123,15 @@ def initdbsync():
 
 async def init():
     initdbsync()
-    await downloadttsvoices()
     heartbeat.init()
     tempfiles.init()
+    await downloadttsvoices()
 
 class MyBot(commands.AutoShardedBot):
     async def setup_hook(self):
         logger.debug(f"initializing cogs")
         await core.database.init_database()
-        if config.bot_list_data:
-            logger.info("bot list data found. botblock will start when bot is ready.")
-            await bot.add_cog(DiscordListsPost(bot))
-        else:
-            logger.debug("no bot list data found")
-        await asyncio.gather(
+        cogs = [
             bot.add_cog(Caption(bot)),
             bot.add_cog(Media(bot)),
             bot.add_cog(Conversion(bot)),
@@ -134,11 +142,24 @@ class MyBot(commands.AutoShardedBot):
             bot.add_cog(ErrorHandlerCog(bot)),
             bot.add_cog(CommandChecksCog(bot)),
             bot.add_cog(BotEventsCog(bot)),
-        )
+        ]
+        if config.bot_list_data:
+            logger.info("bot list data found. botblock will start when bot is ready.")
+            cogs.append(bot.add_cog(DiscordListsPost(bot)))
+        else:
+            logger.debug("no bot list data found")
+        await asyncio.gather(*cogs)
+
+    async def close(self):
+        # the shared session's connector is bound to this loop, so it has to be
+        # closed here; after bot.run() returns the loop is gone
+        await close_http_session()
+        await super().close()
 
 if __name__ == "__main__":
     logger.log(25, "Hello World!")
     logger.info(f"discord.py {discord.__version__}")
+    install_patches()
     asyncio.run(init())
     if hasattr(config, "shard_count") and config.shard_count is not None:
         shard_count = config.shard_count
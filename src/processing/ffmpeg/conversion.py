@@ -5,10 +5,13 @@ from processing.run_command import run_command
 from utils.tempfiles import reserve_tempfile
 
 # Add common FFmpeg flags as constants
-COMMON_FLAGS = ["-hide_banner", "-y"]
-VIDEO_FLAGS = ["-movflags", "+faststart", "-max_muxing_queue_size", "9999"]
-AUDIO_FLAGS = ["-c:a", "aac", "-q:a", "2"] 
-H264_FLAGS = ["-c:v", "libx264", "-pix_fmt", "yuv420p", "-preset", "ultrafast"]
+# -nostdin stops ffmpeg from stalling on a closed pipe under load
+COMMON_FLAGS = ("-hide_banner", "-y", "-nostdin", "-loglevel", "error", "-nostats")
+VIDEO_FLAGS = ("-movflags", "+faststart", "-max_muxing_queue_size", "9999")
+AUDIO_FLAGS = ("-c:a", "aac", "-q:a", "2")
+H264_FLAGS = ("-c:v", "libx264", "-pix_fmt", "yuv420p", "-preset", "ultrafast")
+# precomputed so the hot reencode path doesn't rebuild the arg list per call
+H264_VIDEO_ARGS = (*H264_FLAGS, "-vf", "scale=ceil(iw/2)*2:ceil(ih/2)*2,premultiply=inplace=1")
 
 async def videotogif(video):
     if (await get_vcodec(video))["codec_name"] == "gif":
@@ -20,16 +23,18 @@ async def videotogif(video):
     
     fps_filter = f"{'fps=fps=50,' if fps > 50 else ''}"
     
+    # palettegen/paletteuse already quantize; the old geq pre-rounding pass evaluated
+    # an interpreted expression per pixel per channel and cost far more than it saved
     await run_command("ffmpeg", *COMMON_FLAGS,
                      "-i", video,
                      "-gifflags", "-transdiff",
                      "-loop", str(lc),
                      "-vf",
                      f"{fps_filter}split[s0][s1];"
-                     "[s0]geq=r='bitor(bitand(r(X,Y),248),4)':g='bitor(bitand(g(X,Y),248),4)':b='bitor(bitand(b(X,Y),248),4)',"
-                     "palettegen=reserve_transparent=1:stats_mode=single[p];"
+                     "[s0]palettegen=reserve_transparent=1:stats_mode=single[p];"
                      "[s1][p]paletteuse=dither=bayer:bayer_scale=3:new=1",
                      "-fps_mode", "vfr",
+                     "-threads", "0",
                      outname)
     return outname
 
@@ -37,24 +42,25 @@ async def video_reencode(video):
     assert (mt := await video.mediatype()) in [VIDEO, GIF], f"file {video} with type {mt} passed to reencode()"
     
     vcodec, acodec = await va_codecs(video)
-    vcode = ["copy"] if vcodec == "h264" else [*H264_FLAGS, "-vf", 
-                                              "scale=ceil(iw/2)*2:ceil(ih/2)*2,premultiply=inplace=1"]
-    acode = ["copy"] if acodec == "aac" else AUDIO_FLAGS
-    
+    # the codec flag lives inside the arg tuples: H264_VIDEO_ARGS/AUDIO_FLAGS already
+    # carry -c:v/-c:a, so prefixing another one here would pass the flag twice
+    vcode = ("-c:v", "copy") if vcodec == "h264" else H264_VIDEO_ARGS
+    acode = ("-c:a", "copy") if acodec == "aac" else AUDIO_FLAGS
+
     outname = reserve_tempfile("mp4")
     await run_command("ffmpeg", *COMMON_FLAGS,
                      "-i", video,
-                     "-c:v", *vcode,
-                     "-c:a", *acode,
+                     *vcode,
+                     *acode,
                      *VIDEO_FLAGS,
                      outname)
     return outname
 
 async def audio_reencode(audio):
     acodec = await get_acodec(audio)
-    acode = ["copy"] if acodec == "aac" else ["aac", "-q:a", "2"]
+    acode = ("copy",) if acodec == "aac" else ("aac", "-q:a", "2")
     outname = reserve_tempfile("m4a")
-    await run_command("ffmpeg", "-hide_banner", "-i", audio, "-c:a", *acode, outname)
+    await run_command("ffmpeg", *COMMON_FLAGS, "-i", audio, "-c:a", *acode, outname)
     return outname
 
 
@@ -79,14 +85,14 @@ async def forcereencode(file):
     mt = await file.mediatype()
     if mt == IMAGE:
         outname = reserve_tempfile("png")
-        await run_command("ffmpeg", "-hide_banner", "-i", file, "-frames:v", "1", "-c:v",
+        await run_command("ffmpeg", *COMMON_FLAGS, "-i", file, "-frames:v", "1", "-c:v",
                           "png", "-pix_fmt", "rgba",
                           outname)
 
         return outname
     elif mt == VIDEO:
         outname = reserve_tempfile("mp4")
-        await run_command("ffmpeg", "-hide_banner", "-i", file, "-c:v", "libx264", "-pix_fmt", "yuv420p", "-vf",
+        await run_command("ffmpeg", *COMMON_FLAGS, "-i", file, "-c:v", "libx264", "-pix_fmt", "yuv420p", "-vf",
                           "scale=ceil(iw/2)*2:ceil(ih/2)*2,"
                           # turns transparency into blackness
                           "premultiply=inplace=1", "-c:a", "aac", "-q:a", "2",
@@ -95,7 +101,7 @@ async def forcereencode(file):
         return outname
     elif mt == AUDIO:
         outname = reserve_tempfile("m4a")
-        await run_command("ffmpeg", "-hide_banner", "-i", file, "-c:a", "aac", "-q:a", "2", outname)
+        await run_command("ffmpeg", *COMMON_FLAGS, "-i", file, "-c:a", "aac", "-q:a", "2", outname)
         return outname
     elif mt == GIF:
         return await videotogif(file)
@@ -110,7 +116,7 @@ async def giftomp4(gif):
     :return: mp4
     """
     outname = reserve_tempfile("mp4")
-    await run_command("ffmpeg", "-hide_banner", "-i", gif, "-movflags", "faststart", "-pix_fmt", "yuv420p",
+    await run_command("ffmpeg", *COMMON_FLAGS, "-i", gif, "-movflags", "faststart", "-pix_fmt", "yuv420p",
                       "-sws_flags", "spline+accurate_rnd+full_chroma_int+full_chroma_inp", "-vf",
                       "scale=trunc(iw/2)*2:trunc(ih/2)*2", "-fps_mode", "vfr", outname)
 
@@ -124,14 +130,19 @@ async def toaudio(media):
     :return: aac
     """
     name = reserve_tempfile("m4a")
-    await run_command("ffmpeg", "-hide_banner", "-i", media, "-c:a", "aac", "-vn", name)
+    await run_command("ffmpeg", *COMMON_FLAGS, "-i", media, "-c:a", "aac", "-vn", name)
 
     return name
 
 
 async def mediatoimage(media, imagetype):
+    # already a still image in the target codec: the ffmpeg fork would just copy
+    # the one frame, and process startup dominates that. skip it entirely, same as
+    # videotogif does for gif input.
+    if await media.mediatype() == IMAGE and (await get_vcodec(media))["codec_name"] == imagetype:
+        return media
     outname = reserve_tempfile(imagetype)
-    await run_command("ffmpeg", "-hide_banner", "-i", media, "-frames:v", "1", "-c:v",
+    await run_command("ffmpeg", *COMMON_FLAGS, "-i", media, "-frames:v", "1", "-c:v",
                       "copy" if (await get_vcodec(media))["codec_name"] == imagetype else imagetype, "-pix_fmt", "rgba",
                       outname)
 
@@ -155,7 +166,7 @@ async def mediatotempimage(media):
 async def toapng(video):
     outname = reserve_tempfile("apng")
     outname.lock_codec = True
-    await run_command("ffmpeg", "-i", video, "-f", "apng", "-plays", "0",
+    await run_command("ffmpeg", *COMMON_FLAGS, "-i", video, "-f", "apng", "-plays", "0",
                       # "-filter_complex", "split[v],palettegen,[v]paletteuse",
                       # "-fps_mode", "vfr",
                       outname)
@@ -1,6 +1,9 @@
-import json
+import asyncio
 import sys
-from functools import lru_cache
+import threading
+
+import orjson
+
 import apng
 
 from processing.run_command import run_command
@@ -16,74 +19,128 @@ from processing.common import *
 from core.clogs import logger
 
 # Common ffprobe flags
-COMMON_PROBE_FLAGS = ["-v", "panic"]
+COMMON_PROBE_FLAGS = ["-v", "panic", "-hide_banner"]
 JSON_FORMAT_FLAGS = ["-print_format", "json"]
 
-@lru_cache(maxsize=128)
+# one full probe per file covers everything the helpers below need, so repeat
+# lookups on the same file don't each fork another ffprobe. futures are cached instead
+# of results so concurrent callers awaiting the same file share one in-flight probe.
+# functools.lru_cache can't do this: it would memoize the coroutine object itself,
+# which can only be awaited once.
+_probe_cache: dict[str, asyncio.Future] = {}
+_PROBE_CACHE_SIZE = 128
+
+
+async def _probe_file(filename):
+    out = await run_command("ffprobe", filename, *COMMON_PROBE_FLAGS, *JSON_FORMAT_FLAGS,
+                            "-show_streams", "-show_format")
+    data = orjson.loads(out)
+    streams = data.get("streams", [])
+    data["streams_v"] = [stream for stream in streams if stream["codec_type"] == "video"]
+    data["streams_a"] = [stream for stream in streams if stream["codec_type"] == "audio"]
+    return data
+
+
+async def probe_all(filename):
+    """
+    probes all stream and format metadata of a file in one ffprobe call, cached per filename
+    :param filename: filename
+    :return: parsed ffprobe dict with "streams", "format", and filtered "streams_v"/"streams_a" lists
+    """
+    if filename in _probe_cache:
+        return await asyncio.shield(_probe_cache[filename])
+    if len(_probe_cache) >= _PROBE_CACHE_SIZE:
+        _probe_cache.pop(next(iter(_probe_cache)))
+    fut = asyncio.ensure_future(_probe_file(filename))
+    _probe_cache[filename] = fut
+    try:
+        return await asyncio.shield(fut)
+    except Exception:
+        # don't cache failed probes
+        _probe_cache.pop(filename, None)
+        raise
+
+
+def uncache_probe(filename):
+    """drop the cached probe for a file, for callers that rewrite a file in place"""
+    _probe_cache.pop(filename, None)
+
+
 async def is_apng(filename):
-    out = await run_command("ffprobe", filename, *COMMON_PROBE_FLAGS, 
-                          "-select_streams", "v:0", *JSON_FORMAT_FLAGS,
-                          "-show_entries", "stream=codec_name")
-    data = json.loads(out)
-    return bool(data["streams"]) and data["streams"][0]["codec_name"] == "apng"
+    streams = (await probe_all(filename))["streams_v"]
+    return bool(streams) and streams[0]["codec_name"] == "apng"
+
+
+# parsed APNGs are cached with the same shared-future scheme as the probe cache, so
+# framerate and duration requested for the same file share one parse
+_apng_cache: dict[str, asyncio.Future] = {}
+
+
+async def _parsed_apng(filename):
+    """parses an APNG off the event loop, one shared parse per filename"""
+    if filename in _apng_cache:
+        return await asyncio.shield(_apng_cache[filename])
+    if len(_apng_cache) >= _PROBE_CACHE_SIZE:
+        _apng_cache.pop(next(iter(_apng_cache)))
+    # apng.APNG.open is a pure-python chunk parser that reads the whole file; run it
+    # in a thread so it doesn't freeze the bot
+    fut = asyncio.ensure_future(asyncio.to_thread(apng.APNG.open, filename))
+    _apng_cache[filename] = fut
+    try:
+        return await asyncio.shield(fut)
+    except Exception:
+        _apng_cache.pop(filename, None)
+        raise
+
 
-@lru_cache(maxsize=128) 
 async def get_frame_rate(filename):
     """Gets the FPS of a file"""
     logger.info("Getting FPS...")
-    out = await run_command("ffprobe", filename, *COMMON_PROBE_FLAGS, 
-                          "-select_streams", "v:0", *JSON_FORMAT_FLAGS,
-                          "-show_entries", "stream=r_frame_rate,codec_name")
-    data = json.loads(out)
-    
-    if data["streams"][0]["codec_name"] == "apng":
-        return _get_apng_framerate(filename)
-    
-    rate = data["streams"][0]["r_frame_rate"].split("/")
+    stream = (await probe_all(filename))["streams_v"][0]
+
+    if stream["codec_name"] == "apng":
+        return await _get_apng_framerate(filename)
+
+    rate = stream["r_frame_rate"].split("/")
     return float(rate[0]) / float(rate[1]) if len(rate) == 2 else float(rate[0])
 
-def _get_apng_framerate(filename):
+async def _get_apng_framerate(filename):
     """Helper function to calculate APNG framerate"""
-    parsedapng = apng.APNG.open(filename)
-    total_delay = sum(control.delay / (control.delay_den or 100) 
+    parsedapng = await _parsed_apng(filename)
+    total_delay = sum(control.delay / (control.delay_den or 100)
                      for _, control in parsedapng.frames)
     return len(parsedapng.frames) / total_delay
 
-@lru_cache(maxsize=128)
+
 async def get_duration(filename):
     """Gets the duration of a file"""
     logger.info("Getting duration...")
-    out = await run_command("ffprobe", *COMMON_PROBE_FLAGS,
-                          "-show_entries", "format=duration", 
-                          "-of", "default=noprint_wrappers=1:nokey=1", 
-                          filename)
-    
-    if out == "N/A":
-        return _get_apng_duration(filename)
-    return float(out)
-
-def _get_apng_duration(filename):
+    duration = (await probe_all(filename))["format"].get("duration", "N/A")
+
+    if duration == "N/A":
+        return await _get_apng_duration(filename)
+    return float(duration)
+
+async def _get_apng_duration(filename):
     """Helper function to calculate APNG duration"""
-    parsedapng = apng.APNG.open(filename)
+    parsedapng = await _parsed_apng(filename)
     return sum(control.delay / (control.delay_den or 100)
               for _, control in parsedapng.frames)
 
+
 async def get_resolution(filename):
     """
     gets the resolution of a file
     :param filename: filename
     :return: [width, height]
     """
-    out = await run_command("ffprobe", "-v", "panic", "-select_streams", "v:0", "-show_entries",
-                            "stream=width,height:stream_tags=rotate",
-                            "-print_format", "json", filename)
-    out = json.loads(out)
-    w = out["streams"][0]["width"]
-    h = out["streams"][0]["height"]
+    stream = (await probe_all(filename))["streams_v"][0]
+    w = stream["width"]
+    h = stream["height"]
     # if rotated in metadata, swap width and height
-    if "tags" in out["streams"][0]:
-        if "rotate" in out["streams"][0]["tags"]:
-            rot = float(out["streams"][0]["tags"]["rotate"])
+    if "tags" in stream:
+        if "rotate" in stream["tags"]:
+            rot = float(stream["tags"]["rotate"])
             if rot % 90 == 0 and not rot % 180 == 0:
                 w, h = h, w
     return [w, h]
@@ -95,12 +152,9 @@ async def get_vcodec(filename):
     :param filename: filename
     :return: dict containing "codec_name" and "codec_long_name"
     """
-    out = await run_command("ffprobe", "-v", "panic", "-select_streams", "v:0", "-show_entries",
-                            "stream=codec_name,codec_long_name",
-                            "-print_format", "json", filename)
-    out = json.loads(out)
-    if out["streams"]:
-        return out["streams"][0]
+    streams = (await probe_all(filename))["streams_v"]
+    if streams:
+        return streams[0]
     else:
         # only checks for video codec, audio files return Nothinng
         return None
@@ -112,24 +166,19 @@ async def get_acodec(filename):
     :param filename: filename
     :return: dict containing "codec_name" and "codec_long_name"
     """
-    out = await run_command("ffprobe", "-v", "panic", "-select_streams", "a:0", "-show_entries",
-                            "stream=codec_name,codec_long_name",
-                            "-print_format", "json", filename)
-    out = json.loads(out)
-    if out["streams"]:
-        return out["streams"][0]
+    streams = (await probe_all(filename))["streams_a"]
+    if streams:
+        return streams[0]
     else:
         return None
 
 
 async def va_codecs(filename):
-    out = await run_command('ffprobe', '-v', 'panic', '-show_entries', 'stream=codec_name,codec_type', '-print_format',
-                            'json', filename)
-    out = json.loads(out)
+    streams = (await probe_all(filename))["streams"]
     acodec = None
     vcodec = None
-    if out["streams"]:
-        for stream in out["streams"]:
+    if streams:
+        for stream in streams:
             if stream["codec_type"] == "video" and vcodec is None:
                 vcodec = stream["codec_name"]
             elif stream["codec_type"] == "audio" and acodec is None:
@@ -139,23 +188,51 @@ async def va_codecs(filename):
         return None
 
 
+# persistent libmagic instances so each call doesn't reload the magic database.
+# libmagic cookies aren't thread-safe, hence the lock.
+_magic_desc = magic.Magic(mime=False)
+_magic_mime = magic.Magic(mime=True)
+_magic_lock = threading.Lock()
+
+
+def _magic_info(file):
+    with _magic_lock:
+        return _magic_desc.from_file(file), _magic_mime.from_file(file)
+
+
 async def ffprobe(file):
-    return [await run_command("ffprobe", "-hide_banner", file), magic.from_file(file, mime=False),
-            magic.from_file(file, mime=True)]
+    # libmagic blocks, run it in a thread concurrently with the ffprobe subprocess
+    probed, (desc, mime) = await asyncio.gather(
+        run_command("ffprobe", "-hide_banner", file),
+        asyncio.to_thread(_magic_info, file)
+    )
+    return [probed, desc, mime]
 
 
 async def count_frames(video):
+    # packet counting walks the whole file, too slow to fold into probe_all
     # https://stackoverflow.com/a/28376817/9044183
-    return int(await run_command("ffprobe", "-v", "error", "-select_streams", "v:0", "-count_packets", "-show_entries",
-                                 "stream=nb_read_packets", "-of", "csv=p=0", video))
+    return int(await run_command("ffprobe", *COMMON_PROBE_FLAGS, "-select_streams", "v:0", "-count_packets",
+                                 "-show_entries", "stream=nb_read_packets", "-of", "csv=p=0", video))
 
 
 async def frame_n(video, n: int):
-    framecount = await count_frames(video)
-    if not -1 <= n < framecount:
+    if n < -1:
         raise NonBugError(f"Frame {n} does not exist.")
     if n == -1:
-        n = framecount - 1
+        # seek from EOF and keep overwriting until the stream ends: one invocation
+        # that only decodes the tail, instead of a full packet count followed by a
+        # decode from the start
+        frame = reserve_tempfile("png")
+        await run_command("ffmpeg", "-hide_banner", "-sseof", "-1", "-i", video, "-update", "1",
+                          "-c:v", "png", frame)
+        return frame
+    # nb_frames is free when the container records it; only fall back to the
+    # packet-counting scan when it doesn't
+    stream = (await probe_all(video))["streams_v"][0]
+    framecount = int(stream["nb_frames"]) if "nb_frames" in stream else await count_frames(video)
+    if n >= framecount:
+        raise NonBugError(f"Frame {n} does not exist.")
     frame = reserve_tempfile("mkv")
     await run_command("ffmpeg", "-hide_banner", "-i", video, "-vf", f"select='eq(n,{n})'", "-vframes", "1",
                       "-c:v", "ffv1", frame)
@@ -163,5 +240,4 @@ async def frame_n(video, n: int):
 
 
 async def hasaudio(video):
-    return bool(
-        await run_command("ffprobe", "-i", video, "-show_streams", "-select_streams", "a", "-loglevel", "panic"))
+    return bool((await probe_all(video))["streams_a"])
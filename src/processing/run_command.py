@@ -6,6 +6,21 @@ import sys
 
 from core.clogs import logger
 
+# https://stackoverflow.com/a/56884806/9044183
+# set proccess priority low. built once at import, the kwargs are identical per spawn
+if sys.platform == "win32":
+    _startupinfo = subprocess.STARTUPINFO()
+    _startupinfo.dwFlags |= subprocess.BELOW_NORMAL_PRIORITY_CLASS
+    _nicekwargs = {"startupinfo": _startupinfo}
+else:
+
+    def _renice():
+        os.nice(10)
+
+    # close_fds=False skips walking the whole fd table on every spawn; our pipes are
+    # created with O_CLOEXEC anyway so nothing leaks into ffmpeg
+    _nicekwargs = {"preexec_fn": _renice, "close_fds": False}
+
 
 async def run_command(*args: str):
     """
@@ -15,19 +30,14 @@ async def run_command(*args: str):
     :return: the result of the command
     """
 
-    # https://stackoverflow.com/a/56884806/9044183
-    # set proccess priority low
-    if sys.platform == "win32":
-        startupinfo = subprocess.STARTUPINFO()
-        startupinfo.dwFlags |= subprocess.BELOW_NORMAL_PRIORITY_CLASS
-        nicekwargs = {"startupinfo": startupinfo}
-    else:
-        nicekwargs = {"preexec_fn": lambda: os.nice(10)}
+    # coerce once up-front: TempFile is already a str subclass, but this normalizes
+    # any stray non-str args before they hit subprocess internals and the logs
+    args = tuple(map(str, args))
 
     # Create subprocess
     process = await asyncio.create_subprocess_exec(
         *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
-        **nicekwargs
+        **_nicekwargs
     )
 
     # Status
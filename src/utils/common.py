@@ -11,13 +11,36 @@ import config
 from core import database
 
 
+_http_session: typing.Optional[aiohttp.ClientSession] = None
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    """
+    lazily creates one shared ClientSession so every request reuses pooled keepalive
+    connections instead of paying a TCP+TLS handshake per call
+    """
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        _http_session = aiohttp.ClientSession(
+            headers={'Connection': 'keep-alive'},
+            timeout=aiohttp.ClientTimeout(total=600),
+            connector=aiohttp.TCPConnector(limit=100, limit_per_host=20, ttl_dns_cache=300,
+                                           keepalive_timeout=75))
+    return _http_session
+
+
+async def close_http_session():
+    global _http_session
+    if _http_session is not None and not _http_session.closed:
+        await _http_session.close()
+    _http_session = None
+
+
 async def fetch(url):
-    async with aiohttp.ClientSession(headers={'Connection': 'keep-alive'},
-                                     timeout=aiohttp.ClientTimeout(total=600)) as session:
-        async with session.get(url) as response:
-            if response.status != 200:
-                response.raise_for_status()
-            return await response.text()
+    async with get_http_session().get(url) as response:
+        if response.status != 200:
+            response.raise_for_status()
+        return await response.text()
 
 
 def get_full_class_name(obj):
@@ -2,8 +2,9 @@
 Miscellaneous helper functions for commands
 """
 
-import json
 import asyncio
+import json
+import time
 from typing import Optional, List
 
 import discord
@@ -18,7 +19,36 @@ from utils.web import contentlength
 
 # Compile regex patterns once
 tenor_url_regex = re.compile(r"https?://tenor\.com/view/([^-]+-)*(\d+)/?")
-txt_file_regex = re.compile(r".*\.txt$", re.IGNORECASE)
+
+# the same gif can be looked up from both the history scan and the explicit tenor
+# path within moments of each other; cache parsed responses briefly to skip the
+# second round-trip. bounded like the probe caches so a long-running bot doesn't
+# accumulate every gif it has ever seen.
+_tenor_cache: dict[str, tuple[float, dict]] = {}
+_TENOR_CACHE_TTL = 300  # seconds
+_TENOR_CACHE_SIZE = 128
+
+
+async def tenor_lookup(gif_id: str) -> dict:
+    """
+    fetches and parses a tenor post by gif id, with a short-lived cache
+    :param gif_id: the numeric tenor gif id
+    :return: parsed tenor API response
+    """
+    key = f"{gif_id}:{config.tenor_key}"
+    cached = _tenor_cache.get(key)
+    if cached:
+        if time.monotonic() - cached[0] < _TENOR_CACHE_TTL:
+            return cached[1]
+        del _tenor_cache[key]  # expired, don't let it linger
+    tenor = json.loads(await fetch(
+        f"https://tenor.googleapis.com/v2/posts?ids={gif_id}&key={config.tenor_key}&limit=1"
+    ))
+    if 'error' not in tenor:  # don't pin transient API errors for 5 minutes
+        if len(_tenor_cache) >= _TENOR_CACHE_SIZE:
+            _tenor_cache.pop(next(iter(_tenor_cache)))
+        _tenor_cache[key] = (time.monotonic(), tenor)
+    return tenor
 
 async def handlemessagesave(m: discord.Message, ignoreatts: Optional[List[discord.Attachment]] = None) -> List[str]:
     """
@@ -38,11 +68,10 @@ async def handlemessagesave(m: discord.Message, ignoreatts: Optional[List[discor
         embed_tasks = []
         for embed in m.embeds:
             if embed.type == "gifv":
-                if (match := tenor_url_regex.fullmatch(embed.url)):
+                # cheap substring guard so the regex engine only runs on candidate urls
+                if embed.url and "tenor.com/view/" in embed.url and (match := tenor_url_regex.fullmatch(embed.url)):
                     gif_id = match.group(2)
-                    tenor_task = asyncio.create_task(fetch(
-                        f"https://tenor.googleapis.com/v2/posts?ids={gif_id}&key={config.tenor_key}&limit=1"
-                    ))
+                    tenor_task = asyncio.create_task(tenor_lookup(gif_id))
                     embed_tasks.append(tenor_task)
             elif embed.type in ["image", "video", "audio"]:
                 url_check = asyncio.create_task(contentlength(embed.url))
@@ -56,19 +85,18 @@ async def handlemessagesave(m: discord.Message, ignoreatts: Optional[List[discor
         
         # Process results
         for result in results:
-            if isinstance(result, str):
+            if isinstance(result, dict):
                 # Handle tenor API response
-                tenor_data = json.loads(result)
-                if 'results' in tenor_data:
-                    detectedfiles.append(TenorUrl(tenor_data['results'][0]['media_formats']['mp4']['url']))
+                if 'results' in result:
+                    detectedfiles.append(TenorUrl(result['results'][0]['media_formats']['mp4']['url']))
             elif result:  # Handle content length checks
                 detectedfiles.append(embed.url)
 
     # Process attachments
     if m.attachments and (ignoreatts is None or any(att not in ignoreatts for att in m.attachments)):
         detectedfiles.extend(
-            att.url for att in m.attachments 
-            if not txt_file_regex.match(att.filename)
+            att.url for att in m.attachments
+            if not att.filename.lower().endswith(".txt")
         )
 
     # Process stickers
@@ -106,13 +134,41 @@ async def imagesearch(ctx, nargs=1, ignore: Optional[List[discord.Attachment]] =
         if len(outfiles) >= nargs:
             return outfiles[:nargs]
 
-    # Check channel history
-    async for m in ctx.channel.history(limit=50, before=ctx.message):
-        if m.id not in seen_messages:
+    # Check channel history. saves run concurrently so slow Tenor/CDN probes overlap
+    # instead of serializing, but results are consumed in message order so the
+    # closest media still wins. media is usually only a few messages up, so scan a
+    # small first page and only pull more history if it comes up short.
+    history_limit = max(nargs * 5, 20)
+    page = min(10, history_limit) if nargs == 1 else history_limit
+    remaining = history_limit
+    before = ctx.message
+    while remaining > 0:
+        tasks = []
+        last = None
+        async for m in ctx.channel.history(limit=page, before=before):
+            last = m
+            if m.id in seen_messages:
+                continue
             seen_messages.add(m.id)
-            outfiles.extend(await handlemessagesave(m))
-            if len(outfiles) >= nargs:
-                return outfiles[:nargs]
+            # nothing that could hold media, don't bother spawning a save
+            if not (m.embeds or m.attachments or m.stickers
+                    or m.type == discord.MessageType.thread_starter_message):
+                continue
+            tasks.append(asyncio.create_task(handlemessagesave(m)))
+        try:
+            for task in tasks:
+                outfiles.extend(await task)
+                if len(outfiles) >= nargs:
+                    return outfiles[:nargs]
+        finally:
+            # cancel any probes still in flight once we have enough (or on error)
+            for task in tasks:
+                task.cancel()
+        if last is None:  # channel history exhausted
+            break
+        remaining -= page
+        before = last
+        page = remaining
 
     return False if not outfiles else outfiles
 
@@ -128,9 +184,7 @@ async def handletenor(m: discord.Message, ctx: commands.Context, gif=False):
     if len(m.embeds):
         if m.embeds[0].type == "gifv":
             # https://github.com/esmBot/esmBot/blob/master/utils/imagedetect.js#L34
-            tenor = await fetch(
-                f"https://tenor.googleapis.com/v2/posts?ids={m.embeds[0].url.split('-').pop()}&key={config.tenor_key}")
-            tenor = json.loads(tenor)
+            tenor = await tenor_lookup(m.embeds[0].url.split('-').pop())
             if 'error' in tenor:
                 logger.error(tenor['error'])
                 await ctx.send(f"{config.emojis['2exclamation']} Tenor Error! `{tenor['error']}`")
@@ -42,11 +42,13 @@ if config.override_temp_dir is not None:
     temp_dir = config.override_temp_dir
 else:
     if os.path.isdir("/dev/shm"):  # in-memory fs
+        # chained ffmpeg stages hand intermediates to each other as tempfiles, so
+        # keeping them on tmpfs means those handoffs never touch disk
         temp_dir = "/dev/shm/mediaforge"
     else:
         temp_dir = os.path.join(tempfile.gettempdir(), "mediaforge")
 
-logger.debug(f"temp dir is {temp_dir}")
+logger.debug(f"temp dir is {temp_dir}{' (in-memory)' if temp_dir.startswith('/dev/shm') else ''}")
 
 
 def get_random_string(length):
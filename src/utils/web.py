@@ -1,5 +1,4 @@
 import aiofiles
-import aiohttp
 import humanize
 
 import config
@@ -7,6 +6,7 @@ import processing.common
 import processing.ffmpeg.conversion
 from core.clogs import logger
 from processing.mediatype import GIF
+from utils.common import get_http_session
 from utils.tempfiles import reserve_tempfile, TenorUrl
 
 
@@ -31,26 +31,24 @@ async def saveurl(url: str) -> str:
         name.mt = GIF
 
     # https://github.com/aio-libs/aiohttp/issues/3904#issuecomment-632661245
-    async with aiohttp.ClientSession(headers={'Connection': 'keep-alive'},
-                                     timeout=aiohttp.ClientTimeout(total=600)) as session:
-        # i used to make a head request to check size first, but for some reason head requests can be super slow
-        async with session.get(url) as resp:
-            if resp.status == 200:
-                if "Content-Length" not in resp.headers:  # size of file to download
-                    raise Exception("Cannot determine filesize!")
-                size = int(resp.headers["Content-Length"])
-                logger.info(f"Url is {humanize.naturalsize(size)}")
-                if config.max_file_size < size:  # file size to download must be under max configured size.
-                    raise processing.common.NonBugError(f"Your file is too big ({humanize.naturalsize(size)}). "
-                                                        f"I'm configured to only download files up to "
-                                                        f"{humanize.naturalsize(config.max_file_size)}.")
-                logger.info(f"Saving url {url}")
-                async with aiofiles.open(name, mode='wb') as f:
-                    await f.write(await resp.read())
-            else:
-                logger.error(f"aiohttp status {resp.status}")
-                logger.error(f"aiohttp status {await resp.read()}")
-                resp.raise_for_status()
+    # i used to make a head request to check size first, but for some reason head requests can be super slow
+    async with get_http_session().get(url) as resp:
+        if resp.status == 200:
+            if "Content-Length" not in resp.headers:  # size of file to download
+                raise Exception("Cannot determine filesize!")
+            size = int(resp.headers["Content-Length"])
+            logger.info(f"Url is {humanize.naturalsize(size)}")
+            if config.max_file_size < size:  # file size to download must be under max configured size.
+                raise processing.common.NonBugError(f"Your file is too big ({humanize.naturalsize(size)}). "
+                                                    f"I'm configured to only download files up to "
+                                                    f"{humanize.naturalsize(config.max_file_size)}.")
+            logger.info(f"Saving url {url}")
+            async with aiofiles.open(name, mode='wb') as f:
+                await f.write(await resp.read())
+        else:
+            logger.error(f"aiohttp status {resp.status}")
+            logger.error(f"aiohttp status {await resp.read()}")
+            resp.raise_for_status()
     return name
 
 
@@ -69,11 +67,10 @@ async def saveurls(urls: list):
 
 
 async def contentlength(url):
-    async with aiohttp.ClientSession(headers={'Connection': 'keep-alive'}) as session:
-        # i used to make a head request to check size first, but for some reason head requests can be super slow
-        async with session.get(url) as resp:
-            if resp.status == 200:
-                if "Content-Length" not in resp.headers:  # size of file to download
-                    return False
-                else:
-                    return int(resp.headers["Content-Length"])
+    # i used to make a head request to check size first, but for some reason head requests can be super slow
+    async with get_http_session().get(url) as resp:
+        if resp.status == 200:
+            if "Content-Length" not in resp.headers:  # size of file to download
+                return False
+            else:
+                return int(resp.headers["Content-Length"])